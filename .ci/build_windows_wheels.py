@@ -2,38 +2,62 @@
 from __future__ import unicode_literals, print_function
 
 import os.path
+import shutil
 import sys
+import threading
 import time
+from multiprocessing.pool import ThreadPool
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 api_url = 'https://ci.appveyor.com/api'
 account_name = os.getenv('APPVEYOR_ACCOUNT')
 project_slug = os.getenv('APPVEYOR_SLUG')
 headers = {'Authorization': 'Bearer ' + os.getenv('APPVEYOR_TOKEN')}
 
+def new_session():
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(max_retries=Retry(total=5, backoff_factor=0.5))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+session = new_session()
+
 # Trigger the AppVeyor build
-r = requests.post(api_url + '/builds', {
+r = session.post(api_url + '/builds', {
     'accountName': account_name,
     'projectSlug': project_slug,
     'branch': os.getenv('TRAVIS_BRANCH'),
     'commitID': os.getenv('TRAVIS_COMMIT')
-}, headers=headers)
+})
 r.raise_for_status()
 build = r.json()
 print('Started AppVeyor build (buildId={buildId}, version={version})'.format(**build))
 
-# Wait until the build has finished
+# Wait until the build has finished, backing off while nothing changes
+url = '{}/projects/{}/{}/build/{}'.format(api_url, account_name, project_slug,
+                                          build['version'])
+etag = None
+status = None
+polls = 0
 while True:
-    url = '{}/projects/{}/{}/build/{}'.format(api_url, account_name, project_slug,
-                                              build['version'])
-    r = requests.get(url, headers=headers)
+    r = session.get(url, headers={'If-None-Match': etag} if etag else None)
     r.raise_for_status()
-    build = r.json()['build']
-    status = build['status']
+    if r.status_code != 304:
+        etag = r.headers.get('ETag')
+        build = r.json()['build']
+        if build['status'] != status:
+            polls = 0
+        status = build['status']
     if status in ('starting', 'queued', 'running'):
-        print('Build status: {}; checking again in 5 seconds'.format(status))
-        time.sleep(5)
+        delay = min(30, 2 ** polls)
+        polls = min(polls + 1, 5)
+        print('Build status: {}; checking again in {} seconds'.format(status, delay))
+        time.sleep(delay)
     elif status == 'success':
         print('Build successful')
         job_ids = [job['jobId'] for job in build['jobs']]
@@ -43,17 +67,34 @@ while True:
         sys.exit(1)
 
 # Download the artifacts to wheelhouse/
-os.mkdir('wheelhouse')
+if not os.path.isdir('wheelhouse'):
+    os.makedirs('wheelhouse')
+
+artifacts = []
 for job_id in job_ids:
-    r = requests.get('{}/buildjobs/{}/artifacts'.format(api_url, job_id), headers=headers)
+    r = session.get('{}/buildjobs/{}/artifacts'.format(api_url, job_id))
     r.raise_for_status()
     for artifact in r.json():
-        url = '{}/buildjobs/{}/artifacts/{}'.format(api_url, job_id, artifact['fileName'])
-        r = requests.get(url, headers=headers, stream=True)
-        r.raise_for_status()
-        file_name = 'wheelhouse/' + os.path.basename(artifact['fileName'])
-        with open(file_name, 'wb') as f:
-            for chunk in r.iter_content(None):
-                f.write(chunk)
-
-        print('Downloaded ' + f.name)
+        artifacts.append((job_id, artifact['fileName']))
+
+local = threading.local()
+
+def download(job_artifact):
+    job_id, file_name = job_artifact
+    if not hasattr(local, 'session'):
+        local.session = new_session()
+    url = '{}/buildjobs/{}/artifacts/{}'.format(api_url, job_id, file_name)
+    r = local.session.get(url, stream=True)
+    r.raise_for_status()
+    r.raw.decode_content = True
+    with open('wheelhouse/' + os.path.basename(file_name), 'wb') as f:
+        shutil.copyfileobj(r.raw, f, 1 << 20)
+    return f.name
+
+pool = ThreadPool(8)
+try:
+    for file_name in pool.imap_unordered(download, artifacts):
+        print('Downloaded ' + file_name)
+finally:
+    pool.close()
+    pool.join()
@@ -2,6 +2,7 @@
 
 """16-bit ECC encoder as in the Samsung S5PV210 and Exynos NAND controllers"""
 
+import binascii
 import bchlib
 import sys
 
@@ -12,12 +13,11 @@ xor_data = bytearray(b'\x9A\xD7\xEF\x91\x88\x80\xFB\xF7' + \
                      b'\x06\x3A\x5C\x9F\x49\x24\xD0\x75' + \
                      b'\x02\xE3\x59\xE0\xE4\xBC\x1E\x20' + \
                      b'\x70\x2E')
+xor_int = int(binascii.hexlify(xor_data), 16)
 
 def xor_ecc(ecc):
-  new_ecc = bytearray()
-  for a, b in zip(ecc, xor_data):
-    new_ecc.append(a ^ b)
-  return new_ecc
+  new_ecc = int(binascii.hexlify(ecc), 16) ^ xor_int
+  return bytearray(binascii.unhexlify('%0*x' % (2 * len(ecc), new_ecc)))
 
 bch = bchlib.BCH(ECC_POLY, ECC_BITS)
 ecc = bch.encode(b'\xFF' * 512)
@@ -1,7 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
+import subprocess
+
 from setuptools import Extension, setup
+from setuptools.command.build_ext import build_ext
+from distutils.errors import DistutilsSetupError
 
 __version__ = '0.14.0'
 
@@ -9,11 +14,67 @@ bchlib_src = ['src/bchlib.c',
               'src/bch.c']
 bchlib_dep = ['src/bch.h']
 
-bchlib_ext = Extension('bchlib', bchlib_src, depends=bchlib_dep,
-                       extra_compile_args=['-std=c99'])
+bchlib_ext = Extension('bchlib', bchlib_src, depends=bchlib_dep)
+
+
+class bchlib_build_ext(build_ext):
+    """Pick optimization flags for the compiler in use.
+
+    Opt-in environment variables:
+      BCHLIB_OPENMP=1           encode_batch() encodes buffers in parallel
+      BCHLIB_NATIVE=1           tune for the build machine and enable LTO
+      BCHLIB_PGO=generate|use   profile-guided optimization (gcc only)
+    """
+
+    def compiler_is_clang(self):
+        try:
+            out = subprocess.check_output(self.compiler.compiler[:1] +
+                                          ['--version'],
+                                          stderr=subprocess.STDOUT)
+        except (OSError, subprocess.CalledProcessError):
+            return False
+        return b'clang' in out
+
+    def build_extensions(self):
+        msvc = self.compiler.compiler_type == 'msvc'
+        native = os.getenv('BCHLIB_NATIVE') == '1'
+        pgo = os.getenv('BCHLIB_PGO')
+
+        if msvc:
+            cflags = ['/O2']
+            ldflags = []
+            if os.getenv('BCHLIB_OPENMP') == '1':
+                cflags += ['/openmp']
+            if native:
+                cflags += ['/GL']
+                ldflags += ['/LTCG']
+        else:
+            cflags = ['-std=c99', '-O3', '-funroll-loops', '-ftree-vectorize']
+            ldflags = []
+            if os.getenv('BCHLIB_OPENMP') == '1':
+                cflags += ['-fopenmp']
+                ldflags += ['-fopenmp']
+            if native:
+                cflags += ['-march=native', '-flto']
+                ldflags += ['-flto']
+            if pgo and self.compiler_is_clang():
+                raise DistutilsSetupError('BCHLIB_PGO is only supported '
+                                          'with gcc')
+            if pgo == 'generate':
+                cflags += ['-fprofile-generate']
+                ldflags += ['-fprofile-generate']
+            elif pgo == 'use':
+                cflags += ['-fprofile-use', '-fprofile-correction']
+
+        for ext in self.extensions:
+            ext.extra_compile_args = cflags + ext.extra_compile_args
+            ext.extra_link_args = ldflags + ext.extra_link_args
+        build_ext.build_extensions(self)
+
 
 setup(name='bchlib', version = __version__,
       ext_modules = [bchlib_ext],
+      cmdclass = {'build_ext': bchlib_build_ext},
       description = 'A python wrapper module for the kernel BCH library.',
       url = 'https://github.com/jkent/python-bchlib',
       author = 'Jeff Kent',
@@ -43,7 +43,9 @@
  * Algorithmic details:
  *
  * Encoding is performed by processing 32 input bits in parallel, using 4
- * remainder lookup tables.
+ * remainder lookup tables. On x86-64 and arm64 cpus supporting carry-less
+ * multiplication (PCLMULQDQ/PMULL), 64 input bits are processed at a time
+ * instead, using Barrett reduction against the generator polynomial.
  *
  * The final stage of decoding involves the following internal steps:
  * a. Syndrome computation
@@ -117,6 +119,53 @@
 
 #endif
 
+/*
+ * carry-less multiply (PCLMULQDQ/VPCLMULQDQ, or arm64 PMULL) encoder, selected
+ * at runtime
+ */
+/*
+ * VPCLMULQDQ intrinsics, target attributes and cpu detection need gcc 8, llvm
+ * clang 6 or Apple clang 10 (Xcode 10); older compilers, including the gcc 4.8
+ * of manylinux1, only use the lookup table encoder
+ */
+#if !defined(__KERNEL__) && defined(__x86_64__) && \
+	((defined(__apple_build_version__) && \
+	  (__apple_build_version__ >= 10000000)) || \
+	 (defined(__clang__) && !defined(__apple_build_version__) && \
+	  (__clang_major__ >= 6)) || \
+	 (!defined(__clang__) && defined(__GNUC__) && (__GNUC__ >= 8)))
+# define BCH_HAVE_CLMUL
+# define BCH_CLMUL_X86
+# include <immintrin.h>
+#elif !defined(__KERNEL__) && defined(__aarch64__) && \
+	defined(__AARCH64EL__) && \
+	(defined(__ARM_FEATURE_CRYPTO) || defined(__ARM_FEATURE_AES) || \
+	 (defined(__clang__) && (__clang_major__ >= 16)) || \
+	 (!defined(__clang__) && defined(__GNUC__) && (__GNUC__ >= 6)))
+# define BCH_HAVE_CLMUL
+# define BCH_CLMUL_ARM
+# include <arm_neon.h>
+# if defined(__linux__)
+#  include <sys/auxv.h>
+#  include <asm/hwcap.h>
+# endif
+/* only the PMULL functions may use crypto instructions */
+# if defined(__ARM_FEATURE_CRYPTO) || defined(__ARM_FEATURE_AES)
+#  define BCH_PMULL_TARGET
+# elif defined(__clang__)
+#  define BCH_PMULL_TARGET __attribute__((target("aes")))
+# else
+#  define BCH_PMULL_TARGET __attribute__((target("+crypto")))
+# endif
+#endif
+
+#if defined(BCH_HAVE_CLMUL)
+# define BCH_CLMUL_NONE   0
+# define BCH_CLMUL_SSE    1
+# define BCH_CLMUL_AVX2   2
+# define BCH_CLMUL_PMULL  3
+#endif
+
 #if defined(CONFIG_BCH_CONST_PARAMS)
 #define GF_M(_p)               (CONFIG_BCH_CONST_M)
 #define GF_T(_p)               (CONFIG_BCH_CONST_T)
@@ -130,6 +179,9 @@
 #define BCH_ECC_WORDS(_p)      DIV_ROUND_UP(GF_M(_p)*GF_T(_p), 32)
 #define BCH_ECC_BYTES(_p)      DIV_ROUND_UP(GF_M(_p)*GF_T(_p), 8)
 
+/* maximum size in bytes of the syndrome contribution tables */
+#define BCH_SYN_TAB_MAX        (128*1024)
+
 #ifndef dbg
 #define dbg(_fmt, ...)     do {} while (0)
 #endif
@@ -222,22 +274,218 @@ static void store_ecc8(struct bch_control *bch, uint8_t *dst,
 	memcpy(dst, pad, BCH_ECC_BYTES(bch)-4*nwords);
 }
 
-/**
- * encode_bch - calculate BCH ecc parity of data
- * @bch:   BCH control structure
- * @data:  data to encode
- * @len:   data length in bytes
- * @ecc:   ecc parity data, must be initialized by caller
+#if defined(BCH_HAVE_CLMUL)
+/*
+ * The carry-less multiply encoder processes 64 input bits at a time. The ecc
+ * register r is kept as w 64-bit words, left-justified (r[0] holds the most
+ * significant bits), and r[w] is always 0. For each data word d:
  *
- * The @ecc parity array is used both as input and output parameter, in order to
- * allow incremental computations. It should be of the size indicated by member
- * @ecc_bytes of @bch, and should be initialized to 0 before the first call.
+ * u = r[0]^d
+ * q = floor(u.X^deg(g)/g(X)) = u^(hi64(u*mu)) (Barrett reduction)
+ * r = (r << 64)^(low bits of q*tab)
  *
- * The exact number of computed ecc parity bits is given by member @ecc_bits of
- * @bch; it may be less than m*t for large values of t.
+ * where tab is g(X) without its leading term, left-justified like r. Product
+ * q*tab[k] contributes its low half to r[k] and its high half to r[k-1].
  */
-void encode_bch(struct bch_control *bch, const uint8_t *data,
-		unsigned int len, uint8_t *ecc)
+static inline uint64_t load_be64(const uint8_t *p)
+{
+	uint64_t x;
+
+	memcpy(&x, p, sizeof(x));
+	return __builtin_bswap64(x);
+}
+
+static void load_ecc64(struct bch_control *bch, uint64_t *dst,
+		       const uint32_t *src)
+{
+	unsigned int i;
+	const unsigned int l = BCH_ECC_WORDS(bch);
+
+	memset(dst, 0, (bch->clmul_words+1)*sizeof(*dst));
+	for (i = 0; i < l; i++)
+		dst[i/2] |= (uint64_t)src[i] << ((i & 1) ? 0 : 32);
+}
+
+static void store_ecc64(struct bch_control *bch, uint32_t *dst,
+			const uint64_t *src)
+{
+	unsigned int i;
+	const unsigned int l = BCH_ECC_WORDS(bch);
+
+	for (i = 0; i < l; i++)
+		dst[i] = (uint32_t)(src[i/2] >> ((i & 1) ? 0 : 32));
+}
+
+#if defined(BCH_CLMUL_X86)
+__attribute__((target("pclmul,sse4.1")))
+static void encode_bch_clmul(struct bch_control *bch, const uint8_t *data,
+			     unsigned int nwords, uint32_t *ecc)
+{
+	const unsigned int w = bch->clmul_words;
+	const uint64_t *tab = bch->clmul_tab;
+	uint64_t u, *r = alloca((w+1)*sizeof(*r));
+	unsigned int k;
+	__m128i mu, qq, h, a, b, lo, hi, nlo, nhi;
+
+	load_ecc64(bch, r, ecc);
+	mu = _mm_cvtsi64_si128((long long)bch->clmul_mu);
+
+	while (nwords--) {
+		u = r[0]^load_be64(data);
+		data += 8;
+		qq = _mm_clmulepi64_si128(_mm_cvtsi64_si128((long long)u), mu,
+					  0x00);
+		u ^= (uint64_t)_mm_extract_epi64(qq, 1);
+		qq = _mm_set1_epi64x((long long)u);
+
+		/* products of the first word pair */
+		h = _mm_loadu_si128((const __m128i *)tab);
+		a = _mm_clmulepi64_si128(h, qq, 0x00);
+		b = _mm_clmulepi64_si128(h, qq, 0x01);
+		lo = _mm_unpacklo_epi64(a, b);
+		hi = _mm_unpackhi_epi64(a, b);
+
+		for (k = 0; k < w; k += 2) {
+			/* look ahead one pair for the high halves */
+			if (k+2 < w) {
+				h = _mm_loadu_si128((const __m128i *)(tab+k+2));
+				a = _mm_clmulepi64_si128(h, qq, 0x00);
+				b = _mm_clmulepi64_si128(h, qq, 0x01);
+				nlo = _mm_unpacklo_epi64(a, b);
+				nhi = _mm_unpackhi_epi64(a, b);
+			} else {
+				nlo = nhi = _mm_setzero_si128();
+			}
+			lo = _mm_xor_si128(lo, _mm_alignr_epi8(nhi, hi, 8));
+			lo = _mm_xor_si128(lo,
+				_mm_loadu_si128((const __m128i *)(r+k+1)));
+			_mm_storeu_si128((__m128i *)(r+k), lo);
+			lo = nlo;
+			hi = nhi;
+		}
+	}
+	store_ecc64(bch, ecc, r);
+}
+
+/*
+ * same as encode_bch_clmul(), but process 4 generator words per instruction
+ */
+__attribute__((target("vpclmulqdq,pclmul,avx2,sse4.1")))
+static void encode_bch_vpclmul(struct bch_control *bch, const uint8_t *data,
+			       unsigned int nwords, uint32_t *ecc)
+{
+	const unsigned int w = bch->clmul_words;
+	const uint64_t *tab = bch->clmul_tab;
+	uint64_t u, *r = alloca((w+1)*sizeof(*r));
+	unsigned int k;
+	__m128i mu, q;
+	__m256i qq, h, a, b, lo, hi, nlo, nhi;
+
+	load_ecc64(bch, r, ecc);
+	mu = _mm_cvtsi64_si128((long long)bch->clmul_mu);
+
+	while (nwords--) {
+		u = r[0]^load_be64(data);
+		data += 8;
+		q = _mm_clmulepi64_si128(_mm_cvtsi64_si128((long long)u), mu,
+					 0x00);
+		u ^= (uint64_t)_mm_extract_epi64(q, 1);
+		qq = _mm256_set1_epi64x((long long)u);
+
+		/* products of the first 4 words */
+		h = _mm256_loadu_si256((const __m256i *)tab);
+		a = _mm256_clmulepi64_epi128(h, qq, 0x00);
+		b = _mm256_clmulepi64_epi128(h, qq, 0x01);
+		lo = _mm256_unpacklo_epi64(a, b);
+		hi = _mm256_unpackhi_epi64(a, b);
+
+		for (k = 0; k < w; k += 4) {
+			/* look ahead 4 words for the high halves */
+			if (k+4 < w) {
+				h = _mm256_loadu_si256(
+					(const __m256i *)(tab+k+4));
+				a = _mm256_clmulepi64_epi128(h, qq, 0x00);
+				b = _mm256_clmulepi64_epi128(h, qq, 0x01);
+				nlo = _mm256_unpacklo_epi64(a, b);
+				nhi = _mm256_unpackhi_epi64(a, b);
+			} else {
+				nlo = nhi = _mm256_setzero_si256();
+			}
+			/* shift high halves down by one word across lanes */
+			a = _mm256_permute2x128_si256(hi, nhi, 0x21);
+			lo = _mm256_xor_si256(lo, _mm256_alignr_epi8(a, hi, 8));
+			lo = _mm256_xor_si256(lo,
+				_mm256_loadu_si256((const __m256i *)(r+k+1)));
+			_mm256_storeu_si256((__m256i *)(r+k), lo);
+			lo = nlo;
+			hi = nhi;
+		}
+	}
+	store_ecc64(bch, ecc, r);
+}
+#endif /* BCH_CLMUL_X86 */
+
+#if defined(BCH_CLMUL_ARM)
+BCH_PMULL_TARGET
+static inline uint64x2_t pmull(uint64_t a, uint64_t b)
+{
+	return vreinterpretq_u64_p128(vmull_p64((poly64_t)a, (poly64_t)b));
+}
+
+/*
+ * same as encode_bch_clmul(), using the arm64 PMULL instruction
+ */
+BCH_PMULL_TARGET
+static void encode_bch_pmull(struct bch_control *bch, const uint8_t *data,
+			     unsigned int nwords, uint32_t *ecc)
+{
+	const unsigned int w = bch->clmul_words;
+	const uint64_t *tab = bch->clmul_tab;
+	const uint64_t mu = bch->clmul_mu;
+	uint64_t u, *r = alloca((w+1)*sizeof(*r));
+	unsigned int k;
+	uint64x2_t a, b, lo, hi, nlo, nhi;
+
+	load_ecc64(bch, r, ecc);
+
+	while (nwords--) {
+		u = r[0]^load_be64(data);
+		data += 8;
+		u ^= vgetq_lane_u64(pmull(u, mu), 1);
+
+		/* products of the first word pair */
+		a = pmull(tab[0], u);
+		b = pmull(tab[1], u);
+		lo = vzip1q_u64(a, b);
+		hi = vzip2q_u64(a, b);
+
+		for (k = 0; k < w; k += 2) {
+			/* look ahead one pair for the high halves */
+			if (k+2 < w) {
+				a = pmull(tab[k+2], u);
+				b = pmull(tab[k+3], u);
+				nlo = vzip1q_u64(a, b);
+				nhi = vzip2q_u64(a, b);
+			} else {
+				nlo = nhi = vdupq_n_u64(0);
+			}
+			lo = veorq_u64(lo, vextq_u64(hi, nhi, 1));
+			lo = veorq_u64(lo, vld1q_u64(r+k+1));
+			vst1q_u64(r+k, lo);
+			lo = nlo;
+			hi = nhi;
+		}
+	}
+	store_ecc64(bch, ecc, r);
+}
+#endif /* BCH_CLMUL_ARM */
+#endif /* BCH_HAVE_CLMUL */
+
+/*
+ * same as encode_bch(), but use caller-provided 32-bit parity words buffer
+ */
+static void encode_bch_buf(struct bch_control *bch, const uint8_t *data,
+			   unsigned int len, uint8_t *ecc, uint32_t *ecc_buf)
 {
 	const unsigned int l = BCH_ECC_WORDS(bch)-1;
 	unsigned int i, mlen;
@@ -250,17 +498,34 @@ void encode_bch(struct bch_control *bch, const uint8_t *data,
 	const uint32_t *pdata, *p0, *p1, *p2, *p3;
 
 	if (ecc) {
-		/* load ecc parity bytes into internal 32-bit buffer */
-		load_ecc8(bch, bch->ecc_buf, ecc);
+		/* load ecc parity bytes into 32-bit buffer */
+		load_ecc8(bch, ecc_buf, ecc);
 	} else {
-		memset(bch->ecc_buf, 0, sizeof(r[0]) * (l+1));
+		memset(ecc_buf, 0, sizeof(r[0]) * (l+1));
 	}
 
+#if defined(BCH_HAVE_CLMUL)
+	/* process 64-bit data words using carry-less multiplication */
+	if (bch->clmul && (len >= 8)) {
+		mlen = len/8;
+#if defined(BCH_CLMUL_X86)
+		if (bch->clmul == BCH_CLMUL_AVX2)
+			encode_bch_vpclmul(bch, data, mlen, ecc_buf);
+		else
+			encode_bch_clmul(bch, data, mlen, ecc_buf);
+#else
+		encode_bch_pmull(bch, data, mlen, ecc_buf);
+#endif
+		data += 8*mlen;
+		len  -= 8*mlen;
+	}
+#endif
+
 	/* process first unaligned data bytes */
 	m = ((unsigned long)(size_t)data) & 3;
 	if (m) {
 		mlen = (len < (4-m)) ? len : 4-m;
-		encode_bch_unaligned(bch, data, mlen, bch->ecc_buf);
+		encode_bch_unaligned(bch, data, mlen, ecc_buf);
 		data += mlen;
 		len  -= mlen;
 	}
@@ -270,7 +535,7 @@ void encode_bch(struct bch_control *bch, const uint8_t *data,
 	mlen  = len/4;
 	data += 4*mlen;
 	len  -= 4*mlen;
-	memcpy(r, bch->ecc_buf, sizeof(r[0]) * (l+1));
+	memcpy(r, ecc_buf, sizeof(r[0]) * (l+1));
 
 	/*
 	 * split each 32-bit word into 4 polynomials of weight 8 as follows:
@@ -296,18 +561,72 @@ void encode_bch(struct bch_control *bch, const uint8_t *data,
 
 		r[l] = p0[l]^p1[l]^p2[l]^p3[l];
 	}
-	memcpy(bch->ecc_buf, r, sizeof(r[0]) * (l+1));
+	memcpy(ecc_buf, r, sizeof(r[0]) * (l+1));
 
 	/* process last unaligned bytes */
 	if (len)
-		encode_bch_unaligned(bch, data, len, bch->ecc_buf);
+		encode_bch_unaligned(bch, data, len, ecc_buf);
 
 	/* store ecc parity bytes into original parity buffer */
 	if (ecc)
-		store_ecc8(bch, ecc, bch->ecc_buf);
+		store_ecc8(bch, ecc, ecc_buf);
+}
+
+/**
+ * encode_bch - calculate BCH ecc parity of data
+ * @bch:   BCH control structure
+ * @data:  data to encode
+ * @len:   data length in bytes
+ * @ecc:   ecc parity data, must be initialized by caller
+ *
+ * The @ecc parity array is used both as input and output parameter, in order to
+ * allow incremental computations. It should be of the size indicated by member
+ * @ecc_bytes of @bch, and should be initialized to 0 before the first call.
+ *
+ * The exact number of computed ecc parity bits is given by member @ecc_bits of
+ * @bch; it may be less than m*t for large values of t.
+ */
+void encode_bch(struct bch_control *bch, const uint8_t *data,
+		unsigned int len, uint8_t *ecc)
+{
+	encode_bch_buf(bch, data, len, ecc, bch->ecc_buf);
 }
 EXPORT_SYMBOL_GPL(encode_bch);
 
+static void encode_bch_one(struct bch_control *bch, const uint8_t *data,
+			   unsigned int len, uint8_t *ecc)
+{
+	uint32_t *ecc_buf = alloca(sizeof(uint32_t) * BCH_ECC_WORDS(bch));
+
+	encode_bch_buf(bch, data, len, ecc, ecc_buf);
+}
+
+/**
+ * encode_bch_batch - calculate BCH ecc parity of several independent buffers
+ * @bch:   BCH control structure
+ * @data:  array of @count data buffers to encode
+ * @len:   array of @count data lengths in bytes
+ * @ecc:   array of @count ecc parity buffers, must be initialized by caller
+ * @count: number of buffers
+ *
+ * This is equivalent to calling encode_bch() on each buffer in turn, except
+ * that the internal parity buffer of @bch is not used; buffers are encoded in
+ * parallel when built with OpenMP support.
+ */
+void encode_bch_batch(struct bch_control *bch, const uint8_t * const *data,
+		      const unsigned int *len, uint8_t * const *ecc,
+		      unsigned int count)
+{
+	int i;
+
+#if defined(_OPENMP)
+#pragma omp parallel for schedule(static) if (count > 1)
+#endif
+	for (i = 0; i < (int)count; i++)
+		encode_bch_one(bch, data[i], len[i], ecc[i]);
+}
+EXPORT_SYMBOL_GPL(encode_bch_batch);
+
 static inline int modulo(struct bch_control *bch, unsigned int v)
 {
 	const unsigned int n = GF_N(bch);
@@ -350,20 +669,20 @@ static inline int parity(unsigned int x)
 static inline unsigned int gf_mul(struct bch_control *bch, unsigned int a,
 				  unsigned int b)
 {
-	return (a && b) ? bch->a_pow_tab[mod_s(bch, bch->a_log_tab[a]+
-					       bch->a_log_tab[b])] : 0;
+	return (a && b) ? bch->a_pow_tab[bch->a_log_tab[a]+
+					 bch->a_log_tab[b]] : 0;
 }
 
 static inline unsigned int gf_sqr(struct bch_control *bch, unsigned int a)
 {
-	return a ? bch->a_pow_tab[mod_s(bch, 2*bch->a_log_tab[a])] : 0;
+	return a ? bch->a_pow_tab[2*bch->a_log_tab[a]] : 0;
 }
 
 static inline unsigned int gf_div(struct bch_control *bch, unsigned int a,
 				  unsigned int b)
 {
-	return a ? bch->a_pow_tab[mod_s(bch, bch->a_log_tab[a]+
-					GF_N(bch)-bch->a_log_tab[b])] : 0;
+	return a ? bch->a_pow_tab[bch->a_log_tab[a]+
+				  GF_N(bch)-bch->a_log_tab[b]] : 0;
 }
 
 static inline unsigned int gf_inv(struct bch_control *bch, unsigned int a)
@@ -415,18 +734,41 @@ static void compute_syndromes(struct bch_control *bch, uint32_t *ecc,
 		ecc[s/32] &= ~((1u << (32-m))-1);
 	memset(syn, 0, 2*t*sizeof(*syn));
 
-	/* compute v(a^j) for j=1 .. 2t-1 */
-	do {
-		poly = *ecc++;
-		s -= 32;
-		while (poly) {
-			i = deg(poly);
-			for (j = 0; j < 2*t; j += 2)
-				syn[j] ^= a_pow(bch, (j+1)*(i+s));
+	if (bch->syn_tab) {
+		/* v(a^j) is linear in v: add precomputed rows for each set bit */
+		uint16_t *acc = alloca(t*sizeof(*acc));
+		const uint16_t *p;
+
+		memset(acc, 0, t*sizeof(*acc));
+		do {
+			poly = *ecc++;
+			s -= 32;
+			while (poly) {
+				i = deg(poly);
+				p = bch->syn_tab + (i+s)*t;
+				for (j = 0; j < t; j++)
+					acc[j] ^= p[j];
+
+				poly ^= (1 << i);
+			}
+		} while (s > 0);
 
-			poly ^= (1 << i);
-		}
-	} while (s > 0);
+		for (j = 0; j < t; j++)
+			syn[2*j] = acc[j];
+	} else {
+		/* compute v(a^j) for j=1 .. 2t-1 */
+		do {
+			poly = *ecc++;
+			s -= 32;
+			while (poly) {
+				i = deg(poly);
+				for (j = 0; j < 2*t; j += 2)
+					syn[j] ^= a_pow(bch, (j+1)*(i+s));
+
+				poly ^= (1 << i);
+			}
+		} while (s > 0);
+	}
 
 	/* v(a^(2j)) = v(a^j)^2 */
 	for (j = 0; j < t; j++)
@@ -797,8 +1139,7 @@ static void gf_poly_mod(struct bch_control *bch, struct gf_poly *a,
 			for (i = 0; i < d; i++, p++) {
 				m = rep[i];
 				if (m >= 0)
-					c[p] ^= bch->a_pow_tab[mod_s(bch,
-								     m+la)];
+					c[p] ^= bch->a_pow_tab[m+la];
 			}
 		}
 	}
@@ -1132,7 +1473,9 @@ static int build_gf_tables(struct bch_control *bch, unsigned int poly)
 		if (x & k)
 			x ^= poly;
 	}
-	bch->a_pow_tab[GF_N(bch)] = 1;
+	/* duplicate table, so that sums of two logs need no reduction */
+	for (i = 0; i < GF_N(bch); i++)
+		bch->a_pow_tab[GF_N(bch)+i] = bch->a_pow_tab[i];
 	bch->a_log_tab[0] = 0;
 
 	return 0;
@@ -1172,6 +1515,100 @@ static void build_mod8_tables(struct bch_control *bch, const uint32_t *g)
 	}
 }
 
+/*
+ * compute syndrome contribution tables: row i holds a^(j*i) for j=1,3..2t-1
+ */
+static int build_syn_tables(struct bch_control *bch)
+{
+	unsigned int i, j;
+	const unsigned int t = GF_T(bch);
+	const size_t size = bch->ecc_bits*t*sizeof(*bch->syn_tab);
+
+	/* fall back to direct evaluation if the table would be too large */
+	if (size > BCH_SYN_TAB_MAX)
+		return 0;
+
+	bch->syn_tab = kmalloc(size, GFP_KERNEL);
+	if (bch->syn_tab == NULL)
+		return -1;
+
+	for (i = 0; i < bch->ecc_bits; i++) {
+		for (j = 0; j < t; j++)
+			bch->syn_tab[i*t+j] = a_pow(bch, (2*j+1)*i);
+	}
+	return 0;
+}
+
+#if defined(BCH_HAVE_CLMUL)
+/*
+ * compute carry-less multiply encoder tables, if supported by the cpu
+ */
+static int build_clmul_tables(struct bch_control *bch, const uint32_t *g)
+{
+	unsigned int i, j, mode, w;
+	uint64_t h, mu;
+	const unsigned int l = BCH_ECC_WORDS(bch);
+
+	/* the register must hold at least one full 64-bit word */
+	if (l < 2)
+		return 0;
+
+#if defined(BCH_CLMUL_X86)
+	__builtin_cpu_init();
+	if (__builtin_cpu_supports("vpclmulqdq") &&
+	    __builtin_cpu_supports("avx2") && (l > 6))
+		mode = BCH_CLMUL_AVX2;
+	else if (__builtin_cpu_supports("pclmul") &&
+		 __builtin_cpu_supports("sse4.1"))
+		mode = BCH_CLMUL_SSE;
+	else
+		return 0;
+#elif defined(__linux__)
+	if (!(getauxval(AT_HWCAP) & HWCAP_PMULL))
+		return 0;
+	mode = BCH_CLMUL_PMULL;
+#elif defined(__APPLE__)
+	/* all Apple arm64 cpus have PMULL */
+	mode = BCH_CLMUL_PMULL;
+#else
+	return 0;
+#endif
+
+	/* pad to a whole number of vectors */
+	w = DIV_ROUND_UP(l, 2);
+	w = (mode == BCH_CLMUL_AVX2) ? (w+3) & ~3u : (w+1) & ~1u;
+
+	bch->clmul_tab = kzalloc(w*sizeof(*bch->clmul_tab), GFP_KERNEL);
+	if (bch->clmul_tab == NULL)
+		return -1;
+
+	/* store g(X) without its leading term X^deg(g) */
+	for (i = 0; i < bch->ecc_bits; i++) {
+		j = i+1;
+		if ((g[j/32] >> (31-(j & 31))) & 1)
+			bch->clmul_tab[i/64] |= 1ull << (63-(i & 63));
+	}
+
+	/* mu = floor(X^128/(X^64+h)), only the top 64 bits of g(X) matter */
+	h = bch->clmul_tab[0];
+	mu = 0;
+	for (i = 0; i < 64; i++) {
+		mu <<= 1;
+		if (h >> 63) {
+			mu |= 1;
+			h = (h << 1)^bch->clmul_tab[0];
+		} else {
+			h <<= 1;
+		}
+	}
+
+	bch->clmul = mode;
+	bch->clmul_words = w;
+	bch->clmul_mu = mu;
+	return 0;
+}
+#endif
+
 /*
  * build a base for factoring degree 2 polynomials
  */
@@ -1224,6 +1661,28 @@ static void *bch_alloc(size_t size, int *err)
 	return ptr;
 }
 
+/*
+ * multiply binary polynomial g(X) (bit i = coefficient of X^i, nwords words)
+ * in place by binary polynomial p(X) of degree < 32
+ */
+static void gf2_poly_mul(uint64_t *g, unsigned int nwords, uint32_t p)
+{
+	int w;
+	unsigned int k;
+	uint64_t hi, lo, acc;
+
+	for (w = nwords-1; w >= 0; w--) {
+		hi = g[w];
+		lo = w ? g[w-1] : 0;
+		acc = (p & 1) ? hi : 0;
+		for (k = 1; p >> k; k++) {
+			if ((p >> k) & 1)
+				acc ^= (hi << k)|(lo >> (64-k));
+		}
+		g[w] = acc;
+	}
+}
+
 /*
  * compute generator polynomial for given (m,t) parameters.
  */
@@ -1232,12 +1691,15 @@ static uint32_t *compute_generator_polynomial(struct bch_control *bch)
 	const unsigned int m = GF_M(bch);
 	const unsigned int t = GF_T(bch);
 	int n, err = 0;
-	unsigned int i, j, nbits, r, word, *roots;
+	unsigned int i, j, nbits, r, r0, a, word, deg, *roots;
+	uint32_t p;
+	uint64_t *gbits;
 	struct gf_poly *g;
 	uint32_t *genpoly;
 
-	g = bch_alloc(GF_POLY_SZ(m*t), &err);
-	roots = bch_alloc((bch->n+1)*sizeof(*roots), &err);
+	g = bch_alloc(GF_POLY_SZ(m), &err);
+	roots = bch_alloc(DIV_ROUND_UP(bch->n+1, 32)*sizeof(*roots), &err);
+	gbits = bch_alloc(DIV_ROUND_UP(m*t+1, 64)*sizeof(*gbits), &err);
 	genpoly = bch_alloc(DIV_ROUND_UP(m*t+1, 32)*sizeof(*genpoly), &err);
 
 	if (err) {
@@ -1246,47 +1708,60 @@ static uint32_t *compute_generator_polynomial(struct bch_control *bch)
 		goto finish;
 	}
 
-	/* enumerate all roots of g(X) */
-	memset(roots , 0, (bch->n+1)*sizeof(*roots));
+	/*
+	 * g(X) is the product of the minimal polynomials of a^(2i+1), i < t;
+	 * each one is binary of degree <= m, so build them over GF(2^m) one
+	 * cyclotomic coset at a time, and multiply them together over GF(2)
+	 */
+	memset(roots, 0, DIV_ROUND_UP(bch->n+1, 32)*sizeof(*roots));
+	memset(gbits, 0, DIV_ROUND_UP(m*t+1, 64)*sizeof(*gbits));
+	gbits[0] = 1;
+	deg = 0;
 	for (i = 0; i < t; i++) {
-		for (j = 0, r = 2*i+1; j < m; j++) {
-			roots[r] = 1;
-			r = mod_s(bch, 2*r);
-		}
-	}
-	/* build generator polynomial g(X) */
-	g->deg = 0;
-	g->c[0] = 1;
-	for (i = 0; i < GF_N(bch); i++) {
-		if (roots[i]) {
-			/* multiply g(X) by (X+root) */
-			r = bch->a_pow_tab[i];
+		r0 = 2*i+1;
+		if (roots[r0/32] & (1u << (r0 & 31)))
+			continue;
+		/* multiply (X+a^r) for all conjugates r of r0 */
+		g->deg = 0;
+		g->c[0] = 1;
+		r = r0;
+		do {
+			roots[r/32] |= 1u << (r & 31);
+			a = bch->a_pow_tab[r];
 			g->c[g->deg+1] = 1;
 			for (j = g->deg; j > 0; j--)
-				g->c[j] = gf_mul(bch, g->c[j], r)^g->c[j-1];
+				g->c[j] = gf_mul(bch, g->c[j], a)^g->c[j-1];
 
-			g->c[0] = gf_mul(bch, g->c[0], r);
+			g->c[0] = gf_mul(bch, g->c[0], a);
 			g->deg++;
-		}
+			r = mod_s(bch, 2*r);
+		} while (r != r0);
+
+		for (j = 0, p = 0; j <= g->deg; j++)
+			p |= (g->c[j] & 1) << j;
+
+		deg += g->deg;
+		gf2_poly_mul(gbits, deg/64+1, p);
 	}
 	/* store left-justified binary representation of g(X) */
-	n = g->deg+1;
+	n = deg+1;
 	i = 0;
 
 	while (n > 0) {
 		nbits = (n > 32) ? 32 : n;
 		for (j = 0, word = 0; j < nbits; j++) {
-			if (g->c[n-1-j])
+			if ((gbits[(n-1-j)/64] >> ((n-1-j) & 63)) & 1)
 				word |= 1u << (31-j);
 		}
 		genpoly[i++] = word;
 		n -= nbits;
 	}
-	bch->ecc_bits = g->deg;
+	bch->ecc_bits = deg;
 
 finish:
 	kfree(g);
 	kfree(roots);
+	kfree(gbits);
 
 	return genpoly;
 }
@@ -1362,7 +1837,7 @@ struct bch_control *init_bch(int m, int t, unsigned int prim_poly)
 	bch->n = (1 << m)-1;
 	words  = DIV_ROUND_UP(m*t, 32);
 	bch->ecc_bytes = DIV_ROUND_UP(m*t, 8);
-	bch->a_pow_tab = bch_alloc((1+bch->n)*sizeof(*bch->a_pow_tab), &err);
+	bch->a_pow_tab = bch_alloc((2*bch->n)*sizeof(*bch->a_pow_tab), &err);
 	bch->a_log_tab = bch_alloc((1+bch->n)*sizeof(*bch->a_log_tab), &err);
 	bch->mod8_tab  = bch_alloc(words*1024*sizeof(*bch->mod8_tab), &err);
 	bch->ecc_buf   = bch_alloc(words*sizeof(*bch->ecc_buf), &err);
@@ -1388,7 +1863,16 @@ struct bch_control *init_bch(int m, int t, unsigned int prim_poly)
 		goto fail;
 
 	build_mod8_tables(bch, genpoly);
+#if defined(BCH_HAVE_CLMUL)
+	err = build_clmul_tables(bch, genpoly);
+#endif
 	kfree(genpoly);
+	if (err)
+		goto fail;
+
+	err = build_syn_tables(bch);
+	if (err)
+		goto fail;
 
 	err = build_deg2_base(bch);
 	if (err)
@@ -1420,6 +1904,8 @@ void free_bch(struct bch_control *bch)
 		kfree(bch->syn);
 		kfree(bch->cache);
 		kfree(bch->elp);
+		kfree(bch->clmul_tab);
+		kfree(bch->syn_tab);
 
 		for (i = 0; i < ARRAY_SIZE(bch->poly_2t); i++)
 			kfree(bch->poly_2t[i]);
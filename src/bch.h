@@ -39,7 +39,7 @@
  * @t:          error correction capability in bits
  * @ecc_bits:   ecc exact size in bits, i.e. generator polynomial degree (<=m*t)
  * @ecc_bytes:  ecc max size (m*t bits) in bytes
- * @a_pow_tab:  Galois field GF(2^m) exponentiation lookup table
+ * @a_pow_tab:  Galois field GF(2^m) exponentiation lookup table (2n entries)
  * @a_log_tab:  Galois field GF(2^m) log lookup table
  * @mod8_tab:   remainder generator polynomial lookup tables
  * @ecc_buf:    ecc parity words buffer
@@ -49,6 +49,11 @@
  * @cache:      log-based polynomial representation buffer
  * @elp:        error locator polynomial
  * @poly_2t:    temporary polynomials of degree 2t
+ * @clmul:      carry-less multiply encoder in use (0 if unavailable)
+ * @clmul_words: number of 64-bit words in @clmul_tab (padded)
+ * @clmul_mu:   Barrett constant floor(X^(deg(g)+64)/g(X)), without X^64 term
+ * @clmul_tab:  generator polynomial g(X) without leading term, left-justified
+ * @syn_tab:    odd syndrome contributions of each ecc bit (NULL if too large)
  */
 struct bch_control {
 	unsigned int    m;
@@ -67,6 +72,11 @@ struct bch_control {
 	int            *cache;
 	struct gf_poly *elp;
 	struct gf_poly *poly_2t[4];
+	unsigned int    clmul;
+	unsigned int    clmul_words;
+	uint64_t        clmul_mu;
+	uint64_t       *clmul_tab;
+	uint16_t       *syn_tab;
 };
 
 struct bch_control *init_bch(int m, int t, unsigned int prim_poly);
@@ -76,6 +86,10 @@ void free_bch(struct bch_control *bch);
 void encode_bch(struct bch_control *bch, const uint8_t *data,
 		unsigned int len, uint8_t *ecc);
 
+void encode_bch_batch(struct bch_control *bch, const uint8_t * const *data,
+		      const unsigned int *len, uint8_t * const *ecc,
+		      unsigned int count);
+
 void compute_even_syndromes(struct bch_control *bch, unsigned int *syn);
 
 int decode_bch(struct bch_control *bch, const uint8_t *data, unsigned int len,
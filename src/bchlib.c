@@ -38,11 +38,31 @@ typedef struct {
 	int reversed;
 } BCHObject;
 
+/* reverse the bit order of each byte in a 64-bit word */
+static inline uint64_t
+reverse_bits64(uint64_t x)
+{
+	x = ((x >> 1) & 0x5555555555555555ULL) | ((x & 0x5555555555555555ULL) << 1);
+	x = ((x >> 2) & 0x3333333333333333ULL) | ((x & 0x3333333333333333ULL) << 2);
+	x = ((x >> 4) & 0x0F0F0F0F0F0F0F0FULL) | ((x & 0x0F0F0F0F0F0F0F0FULL) << 4);
+	return x;
+}
+
 static void
 reverse_bytes(uint8_t *dest, const uint8_t *src, size_t length)
 {
-	while(length--) {
-		*dest = (uint8_t)(((*src * 0x0202020202ULL) & 0x010884422010ULL) % 1023);
+	uint64_t x;
+
+	while (length >= sizeof(x)) {
+		memcpy(&x, src, sizeof(x));
+		x = reverse_bits64(x);
+		memcpy(dest, &x, sizeof(x));
+		src += sizeof(x);
+		dest += sizeof(x);
+		length -= sizeof(x);
+	}
+	while (length--) {
+		*dest = (uint8_t)reverse_bits64(*src);
 		src++;
 		dest++;
 	}
@@ -96,6 +116,20 @@ BCH_init(BCHObject *self, PyObject *args, PyObject *kwds)
 	return 0;
 }
 
+static void
+BCH_encode_buffer(BCHObject *self, Py_buffer *data, uint8_t *ecc)
+{
+	if (self->reversed) {
+		uint8_t *reversed = malloc(data->len);
+		reverse_bytes(reversed, data->buf, data->len);
+		encode_bch(self->bch, reversed, (unsigned int)data->len, ecc);
+		free(reversed);
+	}
+	else {
+		encode_bch(self->bch, data->buf, (unsigned int)data->len, ecc);
+	}
+}
+
 static PyObject *
 BCH_encode(BCHObject *self, PyObject *args, PyObject *kwds)
 {
@@ -148,18 +182,7 @@ BCH_encode(BCHObject *self, PyObject *args, PyObject *kwds)
 #endif
 	result_ecc->ob_exports = 0;
 
-
-	if (self->reversed) {
-		uint8_t *reversed = malloc(data.len);
-		reverse_bytes(reversed, data.buf, data.len);
-		encode_bch(self->bch, reversed, (unsigned int)data.len,
-				(uint8_t *)result_ecc->ob_bytes);
-		free(reversed);
-	}
-	else {
-		encode_bch(self->bch, data.buf, (unsigned int)data.len,
-				(uint8_t *)result_ecc->ob_bytes);
-	}
+	BCH_encode_buffer(self, &data, (uint8_t *)result_ecc->ob_bytes);
 
 	result = (PyObject *)result_ecc;
 	Py_INCREF(result_ecc);
@@ -173,6 +196,132 @@ cleanup:
 	return result;
 }
 
+static PyObject *
+BCH_encode_into(BCHObject *self, PyObject *args, PyObject *kwds)
+{
+	Py_buffer data, ecc;
+	static char *kwlist[] = {"data", "ecc", NULL};
+	PyObject *result = NULL;
+
+#if PY_MAJOR_VERSION >= 3
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "y*w*", kwlist, &data,
+			&ecc)) {
+#else
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "s*w*", kwlist, &data,
+			&ecc)) {
+#endif
+		return NULL;
+	}
+
+	if (ecc.len != self->bch->ecc_bytes) {
+		PyErr_Format(PyExc_ValueError,
+			"ecc length must be %d bytes",
+			self->bch->ecc_bytes);
+		goto cleanup;
+	}
+
+	BCH_encode_buffer(self, &data, ecc.buf);
+
+	result = Py_None;
+	Py_INCREF(result);
+
+cleanup:
+	PyBuffer_Release(&data);
+	PyBuffer_Release(&ecc);
+	return result;
+}
+
+static PyObject *
+BCH_encode_batch(BCHObject *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"data", NULL};
+	unsigned int ecc_bytes = self->bch->ecc_bytes;
+	PyObject *po_data, *seq, *value;
+	PyObject *result = NULL;
+	Py_buffer *bufs = NULL;
+	const uint8_t **data = NULL;
+	unsigned int *len = NULL;
+	uint8_t **ecc = NULL;
+	uint8_t *reversed = NULL;
+	Py_ssize_t count, nbufs = 0, total = 0, i;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O", kwlist, &po_data)) {
+		return NULL;
+	}
+
+	seq = PySequence_Fast(po_data, "'data' must be a sequence type");
+	if (seq == NULL) {
+		return NULL;
+	}
+	count = PySequence_Fast_GET_SIZE(seq);
+
+	bufs = calloc(count + 1, sizeof(*bufs));
+	data = calloc(count + 1, sizeof(*data));
+	len = calloc(count + 1, sizeof(*len));
+	ecc = calloc(count + 1, sizeof(*ecc));
+	if (!bufs || !data || !len || !ecc) {
+		PyErr_NoMemory();
+		goto cleanup;
+	}
+
+	result = PyList_New(count);
+	if (result == NULL) {
+		goto cleanup;
+	}
+
+	for (i = 0; i < count; i++) {
+		if (PyObject_GetBuffer(PySequence_Fast_GET_ITEM(seq, i), &bufs[i],
+				PyBUF_SIMPLE) < 0) {
+			goto error;
+		}
+		nbufs++;
+		data[i] = bufs[i].buf;
+		len[i] = (unsigned int)bufs[i].len;
+		total += bufs[i].len;
+
+		value = PyByteArray_FromStringAndSize(NULL, ecc_bytes);
+		if (value == NULL) {
+			goto error;
+		}
+		ecc[i] = (uint8_t *)PyByteArray_AS_STRING(value);
+		memset(ecc[i], 0, ecc_bytes);
+		PyList_SET_ITEM(result, i, value);
+	}
+
+	if (self->reversed) {
+		reversed = malloc(total + 1);
+		if (reversed == NULL) {
+			PyErr_NoMemory();
+			goto error;
+		}
+		for (i = 0, total = 0; i < count; i++) {
+			reverse_bytes(reversed + total, data[i], len[i]);
+			data[i] = reversed + total;
+			total += len[i];
+		}
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	encode_bch_batch(self->bch, data, len, ecc, (unsigned int)count);
+	Py_END_ALLOW_THREADS
+
+	goto cleanup;
+
+error:
+	Py_CLEAR(result);
+cleanup:
+	for (i = 0; i < nbufs; i++) {
+		PyBuffer_Release(&bufs[i]);
+	}
+	free(reversed);
+	free(bufs);
+	free(data);
+	free(len);
+	free(ecc);
+	Py_DECREF(seq);
+	return result;
+}
+
 static PyObject *
 BCH_decode(BCHObject *self, PyObject *args, PyObject *kwds)
 {
@@ -595,6 +744,10 @@ static PyMemberDef BCH_members[] = {
 
 static PyMethodDef BCH_methods[] = {
 	{"encode", (PyCFunction)BCH_encode, METH_VARARGS | METH_KEYWORDS, NULL},
+	{"encode_into", (PyCFunction)BCH_encode_into,
+			METH_VARARGS | METH_KEYWORDS, NULL},
+	{"encode_batch", (PyCFunction)BCH_encode_batch,
+			METH_VARARGS | METH_KEYWORDS, NULL},
 	{"decode", (PyCFunction)BCH_decode, METH_VARARGS | METH_KEYWORDS, NULL},
 	{"decode_inplace", (PyCFunction)BCH_decode_inplace,
 			METH_VARARGS | METH_KEYWORDS, NULL},
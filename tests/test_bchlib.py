@@ -9,38 +9,50 @@ def test_bchlib():
     BCH_BITS = 16
     bch = bchlib.BCH(BCH_POLYNOMIAL, BCH_BITS)
 
-    # random data
-    data = bytearray(os.urandom(512))
-
-    # encode and make a "packet"
-    ecc = bch.encode(data)
-    packet = data + ecc
+    # make a "packet" and encode in place, data and ecc are views into it
+    packet = bytearray(512 + bch.ecc_bytes)
+    view = memoryview(packet)
+    data, ecc = view[:-bch.ecc_bytes], view[-bch.ecc_bytes:]
+    data[:] = os.urandom(len(data))
+    bch.encode_into(data, ecc)
 
     # print hash of packet
     sha1_initial = hashlib.sha1(packet)
 
-    def bitflip(packet):
-        byte_num = random.randint(0, len(packet) - 1)
-        bit_num = random.randint(0, 7)
-        packet[byte_num] ^= (1 << bit_num)
-
     # make BCH_BITS errors
-    for _ in range(BCH_BITS):
-        bitflip(packet)
+    for bit_num in random.sample(range(len(packet) * 8), BCH_BITS):
+        packet[bit_num // 8] ^= (1 << (bit_num & 7))
 
     # print hash of packet
     sha1_corrupt = hashlib.sha1(packet)
 
-    # de-packetize
-    data, ecc = packet[:-bch.ecc_bytes], packet[-bch.ecc_bytes:]
-
     # correct
     bitflips = bch.decode_inplace(data, ecc)
 
-    # packetize
-    packet = data + ecc
-
     # print hash of packet
     sha1_corrected = hashlib.sha1(packet)
 
     assert sha1_initial.digest() == sha1_corrected.digest()
+    assert sha1_corrupt.digest() != sha1_corrected.digest()
+
+def test_encode_batch():
+    bch = bchlib.BCH(8219, 16)
+    datas = [bytearray(os.urandom(n)) for n in (0, 1, 7, 64, 512)]
+    eccs = bch.encode_batch(datas)
+    assert eccs == [bch.encode(data) for data in datas]
+
+    bch = bchlib.BCH(8219, 16, reverse=True)
+    assert bch.encode_batch(datas) == [bch.encode(data) for data in datas]
+
+def test_encode_into():
+    bch = bchlib.BCH(8219, 16)
+    data = bytearray(os.urandom(512))
+    ecc = bytearray(bch.ecc_bytes)
+    assert bch.encode_into(data, ecc) is None
+    assert ecc == bch.encode(data)
+
+    # chaining continues from the current ecc contents
+    ecc[:] = bytearray(bch.ecc_bytes)
+    bch.encode_into(data[:256], ecc)
+    bch.encode_into(data[256:], ecc)
+    assert ecc == bch.encode(data)